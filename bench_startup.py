@@ -0,0 +1,81 @@
+"""
+bench_startup.py
+----------------
+Cold-start benchmark for the lookup server. Each run starts a fresh Python
+process that imports main (Flask + data load) and serves one /result
+request through the test client, which is what the first student waits for
+after a scale-from-zero. The first response is timed from the parent, from
+spawning the process until the probe reports back, so interpreter startup
+counts too. Reports the median of several runs and exits
+non-zero when a budget is exceeded.
+
+Usage:
+    python bench_startup.py
+    python bench_startup.py --runs 10 --import-budget 1.0 --first-response-budget 1.2
+    RESULTS_BACKEND=sqlite python bench_startup.py
+"""
+
+import sys
+import csv
+import time
+import json
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+HERE = Path(__file__).parent
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+roll = sys.argv[1]
+status = main.app.test_client().get(f"/result?roll={roll}").status_code
+print(json.dumps({"import_s": t1 - t0, "status": status,
+                  "pandas_loaded": "pandas" in sys.modules}), flush=True)
+"""
+
+def sample_roll():
+    with open(HERE / "data" / "results.csv", newline="", encoding="utf-8") as fh:
+        for row in csv.DictReader(fh):
+            return row["RollNo"]
+    return "0000000"
+
+def run_once(roll):
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", PROBE, roll], cwd=HERE,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    # The probe prints once, right after the first response; exit time isn't counted
+    line = proc.stdout.readline()
+    first_response_s = time.perf_counter() - t0
+    out, err = proc.communicate()
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args, line + out, err)
+    return {**json.loads(line), "first_response_s": first_response_s}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreter runs to take the median of")
+    parser.add_argument("--import-budget", type=float, default=1.0, help="Seconds allowed for `import main`")
+    parser.add_argument("--first-response-budget", type=float, default=1.5,
+                        help="Seconds allowed from process start to the first /result response")
+    args = parser.parse_args()
+
+    roll = sample_roll()
+    runs = [run_once(roll) for _ in range(args.runs)]
+    import_s = statistics.median(r["import_s"] for r in runs)
+    first_s = statistics.median(r["first_response_s"] for r in runs)
+
+    print(f"import main:        {import_s * 1000:8.1f} ms (budget {args.import_budget * 1000:.0f} ms)")
+    print(f"first response:     {first_s * 1000:8.1f} ms (budget {args.first_response_budget * 1000:.0f} ms)")
+    print(f"first status:       {runs[0]['status']}")
+    print(f"pandas imported:    {any(r['pandas_loaded'] for r in runs)}")
+
+    failed = (import_s > args.import_budget or first_s > args.first_response_budget
+              or any(r["pandas_loaded"] for r in runs))
+    if failed:
+        print("❌ Startup budget exceeded")
+        sys.exit(1)
+    print("✅ Within startup budget")
@@ -4,23 +4,140 @@ main.py
 --------
 Flask app to look up FBISE SSC-II Gazette results by Roll Number.
 Loads data from CSV generated by parse_gazette.py (streaming).
+
+Serving needs only Flask and the standard library: rows are kept as tuples
+in a dict keyed by RollNo, so cold starts don't pay for importing pandas.
+`python bench_startup.py` measures import and first-response time.
+
+Set SHARD=<i> to load only data/shards/shard-<i>.csv (written by
+`manage_results.py --shard N`) and sit behind router.py.
+
+Set RESULTS_BACKEND=sqlite to serve from the .db file next to the CSV
+(written by `parse_gazette.py --sqlite`) instead of holding the table in
+memory: each thread opens its own read-only connection, and /search reads
+the file's tokens table instead of building an index in every worker.
 """
 
-from flask import Flask, render_template, request
-import pandas as pd
+import os
+import csv
+import sqlite3
+import threading
+from flask import Flask, jsonify, render_template, request
 from pathlib import Path
+from search_index import MAX_CANDIDATES, MAX_POSTINGS, SearchIndex, query_terms, top_matches
 
 app = Flask(__name__)
 
-DATA_FILE = Path(__file__).parent / "data" / "results.csv"
-
-# Load data into memory on startup
-if not DATA_FILE.exists():
+DATA_DIR = Path(__file__).parent / "data"
+SHARD = os.environ.get("SHARD")
+DATA_FILE = DATA_DIR / "shards" / f"shard-{SHARD}.csv" if SHARD else DATA_DIR / "results.csv"
+BACKEND = os.environ.get("RESULTS_BACKEND", "csv")
+DB_FILE = DATA_FILE.with_suffix(".db")
+MMAP_SIZE = 256 * 1024 * 1024
+
+# Kept as constants so sqlite3's per-connection statement cache reuses them
+LOOKUP_SQL = "SELECT * FROM results WHERE RollNo = ?"
+TOKEN_COUNT_SQL = "SELECT COUNT(*) FROM (SELECT 1 FROM tokens WHERE token >= ? AND token < ? LIMIT ?)"
+TOKEN_RANGE_SQL = "SELECT RollNo FROM tokens WHERE token >= ? AND token < ?"
+# One INTERSECT arm per term; the statement cache keeps one entry per term count
+SEARCH_SQL = "SELECT RollNo, Name, SchoolName, SchoolCode FROM results WHERE RollNo IN ({}) LIMIT ?"
+
+source = DB_FILE if BACKEND == "sqlite" else DATA_FILE
+if not source.exists():
     raise FileNotFoundError(
-        f"{DATA_FILE} not found. Run `python parse_gazette.py` first to generate it."
+        f"{source} not found. Run `python parse_gazette.py` first to generate it."
     )
 
-df = pd.read_csv(DATA_FILE, dtype={"RollNo": str})
+def load_records(path):
+    """Return (columns, {RollNo: row tuple}); the first row for a roll wins."""
+    with open(path, newline="", encoding="utf-8") as fh:
+        reader = csv.reader(fh)
+        columns = next(reader)
+        roll_col = columns.index("RollNo")
+        records = {}
+        for row in reader:
+            records.setdefault(row[roll_col], tuple(row))
+    return columns, records
+
+_local = threading.local()
+if BACKEND == "sqlite":
+    columns, records = None, None
+else:
+    # Load data into memory on startup
+    columns, records = load_records(DATA_FILE)
+
+def db():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(f"{DB_FILE.resolve().as_uri()}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        _local.conn = conn
+    return conn
+
+def load_search_index():
+    picks = [columns.index(c) for c in ("RollNo", "Name", "SchoolName", "SchoolCode")]
+    return SearchIndex(tuple(r[i] for i in picks) for r in records.values())
+
+def search_db(query, school_code=None):
+    """Name search answered from the tokens table written by export_sqlite()."""
+    terms = query_terms(query)
+    if not terms:
+        return [], False
+    ranges = [(t, t + "\uffff") for t in terms]
+    if school_code:
+        # " " sorts below every token character, so this range holds "@code" alone
+        ranges.append((f"@{school_code}", f"@{school_code} "))
+    conn = db()
+    # Same plan as SearchIndex.search: intersect the rarest ranges within the
+    # MAX_POSTINGS budget and let score() check any term left out
+    sized = sorted((conn.execute(TOKEN_COUNT_SQL, (*r, MAX_POSTINGS + 1)).fetchone()[0], r) for r in ranges)
+    picked, budget = [sized[0][1]], MAX_POSTINGS - sized[0][0]
+    for size, r in sized[1:]:
+        if size > budget:
+            break
+        picked.append(r)
+        budget -= size
+
+    sql = SEARCH_SQL.format(" INTERSECT ".join([TOKEN_RANGE_SQL] * len(picked)))
+    rows = conn.execute(sql, (*(b for r in picked for b in r), MAX_CANDIDATES + 1)).fetchall()
+    truncated = len(rows) > MAX_CANDIDATES
+    return top_matches(terms, school_code, (tuple(r) for r in rows[:MAX_CANDIDATES])), truncated
+
+
+# CSV backend only: built on the first /search so cold starts and plain lookups never pay for it
+search_index = None
+search_index_lock = threading.Lock()
+
+def optional(value, cast):
+    return cast(value) if value not in (None, "") else None
+
+def whole(value):
+    # Spreadsheet edits and float columns write 842 as "842.0"
+    return int(float(value))
+
+def lookup(roll):
+    if records is None:
+        row = db().execute(LOOKUP_SQL, (roll,)).fetchone()
+        row = dict(row) if row is not None else None
+    else:
+        row = records.get(roll)
+        row = dict(zip(columns, row)) if row is not None else None
+    if row is None:
+        return None
+    return {
+        "RollNo": row["RollNo"],
+        "Name": row["Name"],
+        "Status": row["Status"],
+        "Marks": optional(row["Marks"], whole),
+        "Grade": row["Grade"],
+        "SchoolName": row["SchoolName"],
+        "SchoolCode": row["SchoolCode"],
+        # Precomputed by parse_gazette.add_ranks(); absent in older CSVs
+        "Rank": optional(row.get("Rank"), whole),
+        "Percentile": optional(row.get("Percentile"), float),
+        "SchoolRank": optional(row.get("SchoolRank"), whole),
+    }
 
 @app.route("/")
 def index():
@@ -32,24 +149,31 @@ def result():
     if not roll.isdigit() or len(roll) != 7:
         return render_template("not_found.html", roll=roll), 404
 
-    match = df[df["RollNo"] == roll]
-    if match.empty:
+    payload = lookup(roll)
+    if payload is None:
         return render_template("not_found.html", roll=roll), 404
-
-    row = match.iloc[0]
-    payload = {
-        "RollNo": row["RollNo"],
-        "Name": row["Name"],
-        "Status": row["Status"],
-        "Marks": int(row["Marks"]) if not pd.isna(row["Marks"]) else None,
-        "Grade": row["Grade"],
-        "SchoolName": row["SchoolName"],
-        "SchoolCode": row["SchoolCode"],
-    }
     return render_template("result.html", row=payload)
 
+@app.route("/search")
+def search():
+    global search_index
+    query = (request.args.get("q") or "").strip()
+    school = (request.args.get("school") or "").strip()
+    if records is None:
+        matches, truncated = search_db(query, school_code=school or None)
+    else:
+        if search_index is None:
+            with search_index_lock:
+                if search_index is None:
+                    search_index = load_search_index()
+        matches, truncated = search_index.search(query, school_code=school or None)
+    if request.args.get("format") == "json":
+        # Used by router.py to merge matches from every shard
+        return jsonify(matches=matches, truncated=truncated)
+    return render_template("search.html", query=query, school=school, matches=matches, truncated=truncated)
+
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8000, debug=True)
+    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 8000)), debug=True)
 
 
 
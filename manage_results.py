@@ -5,13 +5,53 @@ Utility to manage parsed Gazette data.
 Usage:
     python manage_results.py --stats
     python manage_results.py --dedupe
+    python manage_results.py --merge corrigendum.pdf --label "Corrigendum 1"
+    python manage_results.py --merge corrections.csv
+    python manage_results.py --shard 4
+    python manage_results.py --shard 4 --sqlite
+    python manage_results.py --sqlite
+    python manage_results.py --lookup-file rolls.csv --out results.csv
+
+--merge applies a supplementary gazette (PDF) or a corrections CSV to
+data/results.csv as a delta keyed by RollNo: new rolls are inserted and
+changed rolls are updated. A roll found in a PDF replaces the whole row;
+PageNo keeps pointing into the main gazette and the supplement's page goes
+to SourcePage. In a corrections CSV a blank cell leaves that field
+untouched and "-" clears it. Marks and Grade are cleared whenever the
+resulting Status is not PASS. The previous file is kept as a numbered
+snapshot in data/versions/ together with a change log of the rows it
+superseded.
+
+--shard N splits data/results.csv into N contiguous roll-number ranges of
+roughly equal size under data/shards/, plus a shards.json manifest that
+router.py uses to forward each lookup to the node owning that range.
+
+--sqlite (re)writes the SQLite file served with RESULTS_BACKEND=sqlite,
+for results.csv or, together with --shard, for every shard.
+
+--lookup-file answers a school's spreadsheet of roll numbers in one go:
+the rolls (RollNo column, or the first column) are joined against the
+dataset in a single vectorized merge and written in request order with a
+Found column, so missing rolls are listed too.
 """
 
+import json
+import time
+import shutil
 import argparse
+from datetime import datetime, timezone
 import pandas as pd
 from pathlib import Path
+from parse_gazette import FIELDNAMES, add_ranks, export_sqlite, parse_pdf
 
 DATA_FILE = Path("data/results.csv")
+VERSIONS_DIR = Path("data/versions")
+MANIFEST_FILE = VERSIONS_DIR / "manifest.jsonl"
+SHARDS_DIR = Path("data/shards")
+SHARDS_MANIFEST = SHARDS_DIR / "shards.json"
+BASE_SOURCE = "gazette"
+CLEAR_CELL = "-"
+PASS_ONLY_FIELDS = ["Marks", "Grade"]
 
 def check_file():
     if not DATA_FILE.exists():
@@ -25,22 +65,208 @@ def show_stats():
 
 def dedupe():
     check_file()
-    df = pd.read_csv(DATA_FILE, dtype={"RollNo": str})
+    df = pd.read_csv(DATA_FILE, dtype={"RollNo": str, "SchoolCode": str})
     before = len(df)
     df.drop_duplicates(subset="RollNo", inplace=True)
     after = len(df)
-    df.to_csv(DATA_FILE, index=False)
+    add_ranks(df).to_csv(DATA_FILE, index=False)
     print(f"Deduplicated: {before - after} removed. Final rows: {after}")
 
+def current_version():
+    if not MANIFEST_FILE.exists():
+        return 1
+    with open(MANIFEST_FILE, encoding="utf-8") as fh:
+        return max((json.loads(line)["version"] for line in fh if line.strip()), default=1)
+
+def load_delta(source):
+    """Return (delta indexed by RollNo, whether it came from a PDF)."""
+    source = Path(source)
+    if not source.exists():
+        raise FileNotFoundError(f"{source} not found.")
+    from_pdf = source.suffix.lower() == ".pdf"
+    if from_pdf:
+        VERSIONS_DIR.mkdir(parents=True, exist_ok=True)
+        source = parse_pdf(source, VERSIONS_DIR / f"{source.stem}.parsed.csv")
+
+    # Everything as text so "842" in the delta compares equal to "842" on disk
+    delta = pd.read_csv(source, dtype=str)
+    if "RollNo" not in delta.columns:
+        raise ValueError(f"{source} has no RollNo column.")
+    delta["RollNo"] = delta["RollNo"].str.strip()
+    delta = delta[delta["RollNo"].str.fullmatch(r"\d{7}", na=False)]
+    if from_pdf:
+        delta = delta.rename(columns={"PageNo": "SourcePage"})
+    return delta.drop_duplicates(subset="RollNo", keep="last").set_index("RollNo"), from_pdf
+
+def merge(source, label=None):
+    check_file()
+    label = label or Path(source).name
+    delta, from_pdf = load_delta(source)
+    base = pd.read_csv(DATA_FILE, dtype=str).set_index("RollNo")
+    if "Source" not in base.columns:
+        base["Source"] = BASE_SOURCE
+    base["Source"] = base["Source"].fillna(BASE_SOURCE)
+    if "SourcePage" not in base.columns:
+        base["SourcePage"] = pd.NA
+
+    if from_pdf:
+        # A supplement lists complete rows, so blanks there are real data
+        cols = [c for c in FIELDNAMES if c not in ("RollNo", "PageNo")]
+        delta = delta.reindex(columns=cols + ["SourcePage"])
+    else:
+        cols = [c for c in FIELDNAMES if c in delta.columns and c not in ("RollNo", "PageNo")]
+        delta = delta[cols]
+    known = delta.index.isin(base.index)
+
+    if from_pdf:
+        after = delta.loc[known, cols]
+    else:
+        # Blank cells keep the current value, "-" clears it
+        current = base.loc[delta.index[known], cols]
+        after = delta[known].combine_first(current)[cols].replace(CLEAR_CELL, pd.NA)
+    # Only passing students carry marks and a grade; the delta may not list these columns
+    for col in ["Status"] + PASS_ONLY_FIELDS:
+        if col not in after.columns:
+            after[col] = base.loc[after.index, col]
+    after.loc[after["Status"].fillna("") != "PASS", PASS_ONLY_FIELDS] = pd.NA
+    cols = list(after.columns)
+    before = base.loc[after.index, cols]
+    changed = (after.fillna("") != before.fillna("")).any(axis=1)
+    updated = after[changed].assign(SourcePage=delta.loc[after.index[changed]].get("SourcePage"))
+    inserted = delta[~known].replace(CLEAR_CELL, pd.NA).assign(Source=label)
+    if "Status" in inserted.columns:
+        for col in PASS_ONLY_FIELDS:
+            if col in inserted.columns:
+                inserted.loc[inserted["Status"].fillna("") != "PASS", col] = pd.NA
+    if updated.empty and inserted.empty:
+        print(f"Nothing to merge from {label}: all {int(known.sum())} rolls already up to date.")
+        return
+
+    version = current_version() + 1
+    VERSIONS_DIR.mkdir(parents=True, exist_ok=True)
+    snapshot = VERSIONS_DIR / f"results.v{version - 1}.csv"
+    shutil.copyfile(DATA_FILE, snapshot)
+
+    superseded = base.loc[updated.index].assign(Action="superseded")
+    base.loc[updated.index, cols + ["SourcePage"]] = updated
+    base.loc[updated.index, "Source"] = label
+    merged = add_ranks(pd.concat([base, inserted]).rename_axis("RollNo").reset_index())
+
+    # Logged after ranking so updated and inserted rows show their new positions
+    ranked = merged.drop_duplicates(subset="RollNo").set_index("RollNo")
+    changes = pd.concat([
+        superseded,
+        ranked.loc[updated.index].assign(Action="update"),
+        ranked.loc[inserted.index].assign(Action="insert"),
+    ])
+    changes.to_csv(VERSIONS_DIR / f"changes.v{version}.csv", index_label="RollNo")
+
+    merged.to_csv(DATA_FILE, index=False)
+    if DATA_FILE.with_suffix(".db").exists():
+        export_sqlite(DATA_FILE, DATA_FILE.with_suffix(".db"))
+
+    entry = {
+        "version": version,
+        "source": label,
+        "path": str(source),
+        "merged_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "inserted": len(inserted),
+        "updated": len(updated),
+        "unchanged": int(known.sum()) - len(updated),
+        "previous_snapshot": str(snapshot),
+    }
+    with open(MANIFEST_FILE, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(entry) + "\n")
+    print(f"Merged {label} as v{version}: {entry['inserted']} inserted, "
+          f"{entry['updated']} updated, {entry['unchanged']} unchanged. Final rows: {len(merged)}")
+
+def shard(count, sqlite=False):
+    check_file()
+    if count < 1:
+        raise ValueError("--shard needs at least one shard.")
+    # One row per roll (first wins, like the lookup) so every cut is a clean roll boundary
+    df = pd.read_csv(DATA_FILE, dtype=str).drop_duplicates(subset="RollNo", keep="first")
+    df = df.sort_values("RollNo", kind="stable")
+    if count > len(df):
+        raise ValueError(f"Cannot split {len(df)} rolls into {count} shards.")
+    SHARDS_DIR.mkdir(parents=True, exist_ok=True)
+    for old in SHARDS_DIR.glob("shard-*.*"):
+        if old.suffix in (".csv", ".db") or old.name.endswith((".db-wal", ".db-shm")):
+            old.unlink()
+
+    shards = []
+    for i in range(count):
+        part = df.iloc[len(df) * i // count:len(df) * (i + 1) // count]
+        part.to_csv(SHARDS_DIR / f"shard-{i}.csv", index=False)
+        if sqlite:
+            export_sqlite(SHARDS_DIR / f"shard-{i}.csv", SHARDS_DIR / f"shard-{i}.db")
+        # Shard i owns every roll from its first roll up to the next shard's first roll
+        first = "0000000" if i == 0 else part["RollNo"].iloc[0]
+        shards.append({"shard": i, "first": first, "rows": len(part), "file": f"shard-{i}.csv"})
+    with open(SHARDS_MANIFEST, "w", encoding="utf-8") as fh:
+        json.dump({"source": str(DATA_FILE), "shards": shards}, fh, indent=2)
+    for s in shards:
+        print(f"Shard {s['shard']}: rolls >= {s['first']}, {s['rows']} rows")
+
+def read_rolls(path):
+    try:
+        rolls = pd.read_csv(path, dtype=str, header=None, skip_blank_lines=True)
+    except pd.errors.EmptyDataError:
+        return pd.Series(dtype=str, name="RollNo")
+    header = rolls.iloc[0].fillna("").str.strip()
+    if header.iloc[0].replace(".", "").isdigit():
+        col = rolls.iloc[:, 0]
+    else:
+        # Prefer a column whose header mentions "roll", else the first one
+        named = header.str.upper().str.contains("ROLL")
+        col = rolls.iloc[1:, int(named.argmax()) if named.any() else 0]
+    # Spreadsheets often export 1234567 as "1234567.0"
+    return col.fillna("").str.strip().str.replace(r"\.0$", "", regex=True).rename("RollNo")
+
+def lookup_file(path, out):
+    check_file()
+    t0 = time.perf_counter()
+    df = pd.read_csv(DATA_FILE, dtype=str)
+    df = df.drop_duplicates(subset="RollNo", keep="first")
+    t1 = time.perf_counter()
+
+    requested = read_rolls(path).to_frame()
+    if requested.empty:
+        print(f"No roll numbers found in {path}.")
+        return
+    matched = requested.merge(df, on="RollNo", how="left", indicator=True, sort=False)
+    matched.insert(1, "Found", (matched.pop("_merge") == "both").map({True: "yes", False: "no"}))
+    matched.to_csv(out, index=False, chunksize=10_000)
+    t2 = time.perf_counter()
+
+    found = int((matched["Found"] == "yes").sum())
+    print(f"Looked up {len(matched)} rolls: {found} found, {len(matched) - found} missing -> {out}")
+    print(f"Load {t1 - t0:.2f}s, lookup + write {t2 - t1:.3f}s")
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--stats", action="store_true", help="Show data stats")
     parser.add_argument("--dedupe", action="store_true", help="Remove duplicate roll numbers")
+    parser.add_argument("--merge", metavar="SOURCE", help="Apply a supplementary PDF or corrections CSV")
+    parser.add_argument("--label", help="Provenance label for --merge (defaults to the file name)")
+    parser.add_argument("--shard", type=int, metavar="N", help="Split the dataset into N roll-range shards")
+    parser.add_argument("--sqlite", action="store_true", help="Write the SQLite serving file(s)")
+    parser.add_argument("--lookup-file", metavar="ROLLS_CSV", help="Look up every roll number in a CSV")
+    parser.add_argument("--out", default="lookup_results.csv", help="Output CSV for --lookup-file")
     args = parser.parse_args()
 
     if args.stats:
         show_stats()
     elif args.dedupe:
         dedupe()
+    elif args.merge:
+        merge(args.merge, args.label)
+    elif args.lookup_file:
+        lookup_file(args.lookup_file, args.out)
+    elif args.shard:
+        shard(args.shard, args.sqlite)
+    elif args.sqlite:
+        check_file()
+        export_sqlite(DATA_FILE, DATA_FILE.with_suffix(".db"))
     else:
         parser.print_help()
@@ -1,28 +1,71 @@
 """
 parse_gazette.py (Final Optimized Version)
 ------------------------------------------
-Parse FBISE SSC-II Gazette in batches to avoid memory issues.
+Parse FBISE SSC-II Gazette into data/results.csv.
+
+Text extraction runs in child processes that are recycled every
+--pages-per-worker pages, or earlier once their RSS passes --max-rss-mb,
+so peak memory stays flat no matter how many pages are processed.
+Rolls seen before (in this run or, with --append, already in the CSV) are
+dropped when identical and written to data/conflicts.csv when they differ,
+so the output never needs a separate dedupe pass.
+Extracted page text is cached gzip-compressed under data/text_cache/, keyed
+by the PDF's SHA-256 and EXTRACTOR_VERSION, so --from-cache can re-run the
+parsing heuristics without touching PyPDF2.
 Usage examples:
 
-# Process first 300 pages:
+# Process the whole gazette in one go:
+python parse_gazette.py --all
+
+# Process a page range only:
 python parse_gazette.py --start 1 --end 300
 
-# Process next 300 pages (append to existing results):
+# Process more pages (append to existing results):
 python parse_gazette.py --start 301 --end 600 --append
 
-# Process final pages:
-python parse_gazette.py --start 601 --end 900 --append
+# Tighter memory budget (recycle every 25 pages or at 200 MB):
+python parse_gazette.py --all --pages-per-worker 25 --max-rss-mb 200
+
+# Also write data/results.db for the SQLite serving backend:
+python parse_gazette.py --all --sqlite
+
+# Re-parse from the cached page text after changing the heuristics:
+python parse_gazette.py --all --from-cache
+
+# Time every stage and page, keep a JSON summary and a cProfile dump:
+python parse_gazette.py --all --profile --pstats data/parse.pstats
 
 # Show current CSV stats:
 python parse_gazette.py --stats
 """
 
+import os
 import re
 import csv
+import json
+import time
+import gzip
+import zlib
+import queue
+import shutil
+import hashlib
+import pstats
+import sqlite3
+import cProfile
 import argparse
+import multiprocessing as mp
+from datetime import datetime, timezone
 from pathlib import Path
+import PyPDF2
 from PyPDF2 import PdfReader
-import pandas as pd
+from search_index import row_tokens
+# pandas is imported inside the functions that use it: spawned extraction
+# workers re-import this module and shouldn't start ~50 MB heavier for it
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
 # Config
 PDF_NAME = "Result-Gazette-SSC-II-Ist-Annual-2025.pdf"
@@ -30,6 +73,18 @@ PDF_PATH = Path(__file__).parent / PDF_NAME
 DATA_DIR = Path(__file__).parent / "data"
 DATA_DIR.mkdir(exist_ok=True)
 CSV_PATH = DATA_DIR / "results.csv"
+CONFLICTS_PATH = DATA_DIR / "conflicts.csv"
+DB_PATH = DATA_DIR / "results.db"
+PROFILE_PATH = DATA_DIR / "profile.json"
+TEXT_CACHE_DIR = DATA_DIR / "text_cache"
+# Bump the suffix whenever extract_worker changes how text is produced
+EXTRACTOR_VERSION = f"pypdf2-{PyPDF2.__version__}-1"
+FIELDNAMES = ["RollNo", "Name", "Status", "Marks", "Grade", "SchoolName", "SchoolCode", "PageNo"]
+RANK_FIELDS = ["Rank", "Percentile", "SchoolRank"]
+
+# Memory budget for extraction workers
+PAGES_PER_WORKER = 50
+MAX_RSS_MB = 400
 
 # Patterns
 ROLL_LINE_RE = re.compile(r"^\s*(\d{7})\s+(.+)$")
@@ -89,72 +144,482 @@ def extract_inst_code(line):
     m = re.search(r"(\d{3,5})\s*$", line)
     return m.group(1) if m else None
 
-def parse_pages(reader, start, end, writer):
+def rss_mb():
+    # Peak RSS of the calling process (ru_maxrss is KB on Linux, bytes on macOS)
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if peak > 1 << 32 else peak / 1024
+
+def extract_worker(pdf_path, start, end, max_rss_mb, out, pstats_path=None):
+    # Runs in a child process: PyPDF2 keeps every parsed page alive for the
+    # lifetime of the reader, so the reader dies with the worker.
+    profiler = cProfile.Profile() if pstats_path else None
+    if profiler:
+        profiler.enable()
+    reader = PdfReader(str(pdf_path))
+    total_pages = len(reader.pages)
+    for pageno in range(start, min(end, total_pages) + 1):
+        wall, cpu = time.perf_counter(), time.process_time()
+        txt = reader.pages[pageno - 1].extract_text() or ""
+        timing = (time.perf_counter() - wall, time.process_time() - cpu)
+        out.put((pageno, total_pages, txt, timing))
+        if max_rss_mb and rss_mb() > max_rss_mb:
+            break
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(f"{pstats_path}.worker-{start}")
+    out.put(None)
+
+def iter_page_texts(pdf_path, start, end, pages_per_worker=PAGES_PER_WORKER, max_rss_mb=MAX_RSS_MB,
+                    pstats_path=None):
+    """Yield (pageno, total_pages, text, (extract_wall, extract_cpu)), extracting in recycled workers."""
+    ctx = mp.get_context("spawn")
+    pageno = start
+    while end is None or pageno <= end:
+        stop = pageno + pages_per_worker - 1
+        if end is not None:
+            stop = min(stop, end)
+        out = ctx.Queue(maxsize=pages_per_worker)
+        worker = ctx.Process(target=extract_worker, args=(pdf_path, pageno, stop, max_rss_mb, out, pstats_path))
+        worker.start()
+
+        last, total_pages = pageno - 1, None
+        while True:
+            try:
+                item = out.get(timeout=1)
+            except queue.Empty:
+                if worker.is_alive():
+                    continue
+                raise RuntimeError(f"Extraction worker died on page {last + 1} (exit code {worker.exitcode})")
+            if item is None:
+                break
+            last, total_pages = item[0], item[1]
+            yield item
+        worker.join()
+
+        if total_pages is None or last >= total_pages:
+            return
+        pageno = last + 1
+
+def pdf_digest(pdf_path):
+    h = hashlib.sha256()
+    with open(pdf_path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:16]
+
+def text_cache_dir(pdf_path):
+    return TEXT_CACHE_DIR / f"{pdf_digest(pdf_path)}-{EXTRACTOR_VERSION}"
+
+def cache_page_path(cache_dir, pageno):
+    return cache_dir / f"page-{pageno:05d}.txt.gz"
+
+def cache_pages(pages, cache_dir):
+    """Pass pages through, saving each page's text into cache_dir on the way."""
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # A changed PDF or extractor gets a new key; older caches are dead weight
+    for stale in TEXT_CACHE_DIR.iterdir():
+        if stale.is_dir() and stale != cache_dir:
+            shutil.rmtree(stale)
+
+    meta_path = cache_dir / "meta.json"
+    for page in pages:
+        pageno, total_pages, txt = page[0], page[1], page[2]
+        if not meta_path.exists():
+            meta_path.write_text(json.dumps({"total_pages": total_pages, "extractor": EXTRACTOR_VERSION}))
+        path = cache_page_path(cache_dir, pageno)
+        tmp = path.with_suffix(".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as fh:
+            fh.write(txt)
+        os.replace(tmp, path)
+        yield page
+
+def iter_cached_pages(cache_dir, start, end):
+    """
+    Return pages like iter_page_texts(), read from cache_dir instead of the PDF.
+    Checks the whole range up front so a stale cache fails before any output is touched.
+    """
+    meta_path = cache_dir / "meta.json"
+    if not meta_path.exists():
+        raise FileNotFoundError(f"No text cache at {cache_dir}. Run once without --from-cache first.")
+    total_pages = json.loads(meta_path.read_text())["total_pages"]
+    end = total_pages if end is None else min(end, total_pages)
+
+    missing = [p for p in range(start, end + 1) if not cache_page_path(cache_dir, p).exists()]
+    if missing:
+        raise FileNotFoundError(
+            f"{len(missing)} pages missing from {cache_dir} (first: {missing[0]}). "
+            "Run those pages once without --from-cache."
+        )
+
+    return read_cached_pages(cache_dir, start, end, total_pages)
+
+def read_cached_pages(cache_dir, start, end, total_pages):
+    for pageno in range(start, end + 1):
+        wall, cpu = time.perf_counter(), time.process_time()
+        with gzip.open(cache_page_path(cache_dir, pageno), "rt", encoding="utf-8") as fh:
+            txt = fh.read()
+        yield pageno, total_pages, txt, (time.perf_counter() - wall, time.process_time() - cpu)
+
+class RollTracker:
+    """
+    Remembers every roll number written so far as one packed int per roll
+    (crc32 of the record fields, plus the school code), so a repeat can be
+    told apart as an exact duplicate (dropped) or a conflict (same roll,
+    different record) without keeping whole rows in memory.
+
+    The school code is compared separately and a missing one matches any
+    code: pages re-parsed before their first school header have none.
+    """
+    KEY_FIELDS = ("Name", "Status", "Marks", "Grade")
+    CODE_BITS = 20
+
+    def __init__(self):
+        self.fingerprints = {}
+        self.recorded = set()
+        self.duplicates = 0
+        self.conflicts = 0
+        self.conflicts_written = 0
+
+    @classmethod
+    def from_csv(cls, path, conflicts_path=None):
+        """Seed with the rolls (and recorded conflicts) of earlier runs, without counting them."""
+        tracker = cls()
+        with open(path, newline="", encoding="utf-8") as fh:
+            for rec in csv.DictReader(fh):
+                tracker.fingerprints.setdefault(int(rec["RollNo"]), tracker.packed(rec))
+        if conflicts_path and Path(conflicts_path).exists():
+            with open(conflicts_path, newline="", encoding="utf-8") as fh:
+                tracker.recorded.update((int(rec["RollNo"]), tracker.packed(rec)) for rec in csv.DictReader(fh))
+        return tracker
+
+    def fingerprint(self, rec):
+        values = ("" if rec.get(k) is None else str(rec[k]) for k in self.KEY_FIELDS)
+        return zlib.crc32("\x1f".join(values).encode("utf-8"))
+
+    def school_code(self, rec):
+        # 0 means unknown; codes are 3-5 digits so they fit in CODE_BITS
+        code = str(rec.get("SchoolCode") or "")
+        return int(code) if code.isdigit() else 0
+
+    def packed(self, rec):
+        return self.fingerprint(rec) << self.CODE_BITS | self.school_code(rec)
+
+    def check(self, rec):
+        """Return "new", "duplicate" or "conflict" and record the roll."""
+        roll = int(rec["RollNo"])
+        fp = self.fingerprint(rec)
+        code = self.school_code(rec)
+        seen = self.fingerprints.get(roll)
+        if seen is None:
+            self.fingerprints[roll] = fp << self.CODE_BITS | code
+            return "new"
+        seen_fp, seen_code = seen >> self.CODE_BITS, seen & ((1 << self.CODE_BITS) - 1)
+        if seen_fp == fp and (not code or not seen_code or code == seen_code):
+            if not seen_code:
+                self.fingerprints[roll] = fp << self.CODE_BITS | code
+            self.duplicates += 1
+            return "duplicate"
+        self.conflicts += 1
+        return "conflict"
+
+    def new_conflict(self, rec):
+        """True the first time this exact conflicting record is seen, so it is written once."""
+        key = (int(rec["RollNo"]), self.packed(rec))
+        if key in self.recorded:
+            return False
+        self.recorded.add(key)
+        self.conflicts_written += 1
+        return True
+
+class ParseProfile:
+    """Wall and CPU seconds per stage and per page for --profile runs."""
+    STAGES = ("extract", "institution", "roll_line", "write")
+
+    def __init__(self):
+        self.pages = []
+        self.page = None
+        self.started = time.perf_counter()
+
+    def start_page(self, pageno, extract_timing):
+        stages = {s: [0.0, 0.0] for s in self.STAGES}
+        stages["extract"] = list(extract_timing)
+        self.page = {"page": pageno, "lines": 0, "rows": 0, "stages": stages}
+        self.pages.append(self.page)
+
+    def timed(self, stage, func, *args):
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = func(*args)
+        acc = self.page["stages"][stage]
+        acc[0] += time.perf_counter() - wall
+        acc[1] += time.process_time() - cpu
+        return result
+
+    def summary(self, pdf_path, top=10):
+        def page_wall(p):
+            return sum(w for w, _ in p["stages"].values())
+
+        stages = {
+            s: {"wall_s": round(sum(p["stages"][s][0] for p in self.pages), 4),
+                "cpu_s": round(sum(p["stages"][s][1] for p in self.pages), 4)}
+            for s in self.STAGES
+        }
+        slowest = sorted(self.pages, key=page_wall, reverse=True)[:top]
+        return {
+            "pdf": Path(pdf_path).name,
+            "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "pages": len(self.pages),
+            "lines": sum(p["lines"] for p in self.pages),
+            "rows": sum(p["rows"] for p in self.pages),
+            "elapsed_s": round(time.perf_counter() - self.started, 4),
+            "stages": stages,
+            "slowest_pages": [
+                {"page": p["page"], "lines": p["lines"], "rows": p["rows"],
+                 "wall_s": round(page_wall(p), 4),
+                 "stages": {s: round(w, 4) for s, (w, _) in p["stages"].items()}}
+                for p in slowest
+            ],
+        }
+
+    def report(self, pdf_path, json_path=PROFILE_PATH, top=10):
+        summary = self.summary(pdf_path, top)
+        print(f"⏱ {summary['pages']} pages, {summary['lines']} lines, {summary['rows']} rows "
+              f"in {summary['elapsed_s']:.2f}s")
+        for stage, t in summary["stages"].items():
+            print(f"   {stage:<12} wall {t['wall_s']:>9.3f}s   cpu {t['cpu_s']:>9.3f}s")
+        print("   slowest pages:")
+        for p in summary["slowest_pages"]:
+            print(f"   page {p['page']:>4}: {p['wall_s']:.3f}s, {p['lines']} lines, {p['rows']} rows")
+        with open(json_path, "w", encoding="utf-8") as fh:
+            json.dump(summary, fh, indent=2)
+        print(f"   summary written to {json_path}")
+
+def untimed(stage, func, *args):
+    return func(*args)
+
+def parse_pages(pages, writer, tracker=None, conflicts=None, profile=None):
     current_school = ""
     current_code = None
-    total_pages = len(reader.pages)
+    tracker = tracker or RollTracker()
+    call = profile.timed if profile else untimed
 
-    for pageno in range(start, min(end, total_pages) + 1):
-        page = reader.pages[pageno - 1]
-        txt = page.extract_text() or ""
+    for pageno, total_pages, txt, extract_timing in pages:
+        if profile:
+            profile.start_page(pageno, extract_timing)
         rows = []
+        lines = 0
         for raw in txt.splitlines():
             line = raw.strip()
             if not line:
                 continue
-            if is_institution_line(line):
+            lines += 1
+            if call("institution", is_institution_line, line):
                 current_school = line
                 current_code = extract_inst_code(line)
                 continue
-            rec = parse_roll_line(line)
+            rec = call("roll_line", parse_roll_line, line)
             if rec:
                 rec["SchoolName"] = current_school
                 rec["SchoolCode"] = current_code
                 rec["PageNo"] = pageno
                 rows.append(rec)
-        if rows:
-            for r in rows:
-                writer.writerow(r)
+        if profile:
+            profile.page["lines"], profile.page["rows"] = lines, len(rows)
+        for r in rows:
+            verdict = tracker.check(r)
+            if verdict == "new":
+                call("write", writer.writerow, r)
+            elif verdict == "conflict" and conflicts is not None and tracker.new_conflict(r):
+                conflicts.writerow(r)
         print(f"Processed page {pageno}/{total_pages}")
 
-def build_chunk(start, end, append):
+    if tracker.duplicates or tracker.conflicts:
+        print(f"♻ Dropped {tracker.duplicates} duplicate rolls, {tracker.conflicts} conflicting rolls")
+
+def add_ranks(df):
+    """
+    Add Rank, Percentile and SchoolRank for PASS rows with marks.
+    Ties share the best position (competition ranking: 1, 2, 2, 4) and
+    Percentile is the share of ranked students scoring at or below the row.
+    """
+    import pandas as pd
+    df = df.drop(columns=RANK_FIELDS, errors="ignore")
+    df["Marks"] = pd.to_numeric(df["Marks"], errors="coerce").astype("Int64")
+    marks = df["Marks"].astype("float64").where(df["Status"] == "PASS")
+    df["Rank"] = marks.rank(method="min", ascending=False).astype("Int64")
+    df["Percentile"] = (marks.rank(method="max", pct=True) * 100).round(2)
+    df["SchoolRank"] = marks.groupby(df["SchoolCode"]).rank(method="min", ascending=False).astype("Int64")
+    return df
+
+def finalize_csv(path=CSV_PATH):
+    import pandas as pd
+    df = pd.read_csv(path, dtype={"RollNo": str, "SchoolCode": str})
+    add_ranks(df).to_csv(path, index=False)
+    print(f"🏅 Ranked {int(df['Status'].eq('PASS').sum())} PASS rows")
+
+# SQLite column types; anything not listed is stored as TEXT
+SQL_TYPES = {"Marks": "INTEGER", "PageNo": "INTEGER", "Rank": "INTEGER",
+             "Percentile": "REAL", "SchoolRank": "INTEGER"}
+
+def export_sqlite(csv_path=CSV_PATH, db_path=DB_PATH):
+    """Write the ranked CSV to an SQLite file keyed by RollNo, swapped in atomically.
+
+    A tokens table maps every indexed word (see search_index.row_tokens) to
+    its rolls so main.py can answer name searches from the file as well.
+    """
+    import pandas as pd
+    df = pd.read_csv(csv_path, dtype={"RollNo": str, "SchoolCode": str})
+    df = df.drop_duplicates(subset="RollNo", keep="first")
+    cols = list(df.columns)
+    tmp_path = Path(f"{db_path}.tmp")
+    tmp_path.unlink(missing_ok=True)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        col_defs = ", ".join(
+            f'"{c}" TEXT PRIMARY KEY' if c == "RollNo" else f'"{c}" {SQL_TYPES.get(c, "TEXT")}'
+            for c in cols
+        )
+        conn.execute(f"CREATE TABLE results ({col_defs}) WITHOUT ROWID")
+        placeholders = ", ".join("?" for _ in cols)
+        rows = (
+            tuple(None if pd.isna(v) else v.item() if hasattr(v, "item") else v for v in rec)
+            for rec in df.itertuples(index=False, name=None)
+        )
+        conn.executemany(f"INSERT INTO results VALUES ({placeholders})", rows)
+        conn.execute("CREATE INDEX idx_results_school ON results (SchoolCode)")
+        conn.execute(
+            "CREATE TABLE tokens (token TEXT, RollNo TEXT, PRIMARY KEY (token, RollNo)) WITHOUT ROWID"
+        )
+        named = df[["RollNo", "Name", "SchoolName", "SchoolCode"]].fillna("")
+        conn.executemany("INSERT INTO tokens VALUES (?, ?)", sorted(
+            (w, roll)
+            for roll, name, school, code in named.itertuples(index=False, name=None)
+            for w in row_tokens(name, school, code)
+        ))
+        conn.commit()
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, db_path)
+    print(f"🗄 Wrote {len(df)} rows to {db_path}")
+
+def csv_header(path):
+    with open(path, newline="", encoding="utf-8") as fh:
+        return next(csv.reader(fh), None) or FIELDNAMES
+
+def build_chunk(start, end, append, pages_per_worker=PAGES_PER_WORKER, max_rss_mb=MAX_RSS_MB,
+                profile=None, pstats_path=None, from_cache=False):
     if not PDF_PATH.exists():
         raise FileNotFoundError(f"{PDF_NAME} not found in project root.")
 
-    reader = PdfReader(str(PDF_PATH))
     file_exists = CSV_PATH.exists()
     mode = "a" if append and file_exists else "w"
     header_needed = not (append and file_exists)
+    # Appended rows must follow the existing header, which may carry rank columns
+    fieldnames = FIELDNAMES if header_needed else csv_header(CSV_PATH)
+    conflicts_mode = "a" if append and CONFLICTS_PATH.exists() else "w"
+    # Rolls already in the CSV count as seen so overlapping ranges are dropped,
+    # and conflicts already on file aren't appended again
+    tracker = RollTracker() if header_needed else RollTracker.from_csv(
+        CSV_PATH, CONFLICTS_PATH if conflicts_mode == "a" else None)
+
+    cache_dir = text_cache_dir(PDF_PATH)
+    if from_cache:
+        pages = iter_cached_pages(cache_dir, start, end)
+    else:
+        pages = iter_page_texts(PDF_PATH, start, end, pages_per_worker, max_rss_mb, pstats_path)
+        pages = cache_pages(pages, cache_dir)
 
-    fieldnames = ["RollNo", "Name", "Status", "Marks", "Grade", "SchoolName", "SchoolCode", "PageNo"]
-    with open(CSV_PATH, mode, newline="", encoding="utf-8") as fh:
+    with open(CSV_PATH, mode, newline="", encoding="utf-8") as fh, \
+            open(CONFLICTS_PATH, conflicts_mode, newline="", encoding="utf-8") as cfh:
         writer = csv.DictWriter(fh, fieldnames=fieldnames)
         if header_needed:
             writer.writeheader()
-        parse_pages(reader, start, end, writer)
-
-    print(f"✅ Pages {start}-{end} processed and saved to {CSV_PATH}")
+        conflicts = csv.DictWriter(cfh, fieldnames=FIELDNAMES)
+        if conflicts_mode == "w":
+            conflicts.writeheader()
+        parse_pages(pages, writer, tracker, conflicts, profile)
+
+    if tracker.conflicts_written:
+        print(f"⚠ {tracker.conflicts_written} conflicting rolls written to {CONFLICTS_PATH}")
+
+    finalize_csv(CSV_PATH)
+    print(f"✅ Pages {start}-{end or 'end'} processed and saved to {CSV_PATH}")
+
+def parse_pdf(pdf_path, out_path, pages_per_worker=PAGES_PER_WORKER, max_rss_mb=MAX_RSS_MB):
+    """
+    Parse a whole PDF (e.g. a supplementary gazette) into a fresh, unranked CSV.
+    Rolls listed twice with different data go to <out_path>.conflicts.csv.
+    """
+    out_path = Path(out_path)
+    conflicts_path = out_path.with_suffix(".conflicts.csv")
+    tracker = RollTracker()
+    with open(out_path, "w", newline="", encoding="utf-8") as fh, \
+            open(conflicts_path, "w", newline="", encoding="utf-8") as cfh:
+        writer = csv.DictWriter(fh, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        conflicts = csv.DictWriter(cfh, fieldnames=FIELDNAMES)
+        conflicts.writeheader()
+        parse_pages(iter_page_texts(pdf_path, 1, None, pages_per_worker, max_rss_mb), writer, tracker, conflicts)
+    if tracker.conflicts_written:
+        print(f"⚠ {tracker.conflicts_written} conflicting rolls in {Path(pdf_path).name} written to {conflicts_path}")
+    return out_path
 
 def show_stats():
     if not CSV_PATH.exists():
         print("⚠ No results.csv found. Parse at least one batch first.")
         return
+    import pandas as pd
     df = pd.read_csv(CSV_PATH, dtype={"RollNo": str})
     print(f"📊 Total rows: {len(df)}")
     print(df.head(10))
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
+    parser.add_argument("--all", action="store_true", help="Process every page of the gazette")
     parser.add_argument("--start", type=int, help="Start page (1-based)")
     parser.add_argument("--end", type=int, help="End page (inclusive)")
     parser.add_argument("--append", action="store_true", help="Append to existing CSV")
+    parser.add_argument("--pages-per-worker", type=int, default=PAGES_PER_WORKER,
+                        help="Recycle the extraction worker after this many pages")
+    parser.add_argument("--max-rss-mb", type=int, default=MAX_RSS_MB,
+                        help="Recycle the extraction worker once its RSS exceeds this (0 = no limit)")
+    parser.add_argument("--from-cache", action="store_true",
+                        help="Parse cached page text instead of extracting from the PDF again")
+    parser.add_argument("--sqlite", action="store_true", help="Also write data/results.db after parsing")
+    parser.add_argument("--profile", action="store_true", help="Time each stage and page and report the slowest pages")
+    parser.add_argument("--profile-json", type=Path, default=PROFILE_PATH, help="Where --profile writes its JSON summary")
+    parser.add_argument("--pstats", type=Path, help="Dump cProfile stats (parser and extraction workers) to this file")
     parser.add_argument("--stats", action="store_true", help="Show current stats")
     args = parser.parse_args()
 
     if args.stats:
         show_stats()
-    elif args.start and args.end:
-        build_chunk(args.start, args.end, args.append)
+    elif args.all or (args.start and args.end):
+        start, end = (1, None) if args.all else (args.start, args.end)
+        profile = ParseProfile() if args.profile else None
+        profiler = cProfile.Profile() if args.pstats else None
+        if profiler:
+            profiler.enable()
+        build_chunk(start, end, args.append, args.pages_per_worker, args.max_rss_mb, profile, args.pstats,
+                    args.from_cache)
+        if profiler:
+            profiler.disable()
+            # Fold the per-worker dumps into one file
+            stats = pstats.Stats(profiler)
+            for part in sorted(args.pstats.parent.glob(f"{args.pstats.name}.worker-*")):
+                stats.add(str(part))
+                part.unlink()
+            stats.dump_stats(args.pstats)
+            print(f"   cProfile stats written to {args.pstats}")
+        if profile:
+            profile.report(PDF_PATH, args.profile_json)
+        if args.sqlite:
+            export_sqlite()
     else:
         parser.print_help()
 
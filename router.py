@@ -0,0 +1,102 @@
+"""
+router.py
+---------
+Thin front for a sharded deployment. Reads data/shards/shards.json (written
+by `manage_results.py --shard N`) and forwards each /result lookup to the
+lookup node that owns the roll's range. /search asks every node at once
+and merges their top matches. Nodes are plain main.py processes
+started with SHARD=<i>; their base URLs come from SHARD_URLS, in shard order.
+
+Localhost example with two shards:
+    python manage_results.py --shard 2
+    SHARD=0 PORT=8001 python main.py
+    SHARD=1 PORT=8002 python main.py
+    SHARD_URLS=http://127.0.0.1:8001,http://127.0.0.1:8002 python router.py
+"""
+
+import os
+import json
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+from flask import Flask, Response, render_template, request
+from search_index import merge_matches, query_terms
+
+app = Flask(__name__)
+
+SHARDS_MANIFEST = Path(__file__).parent / "data" / "shards" / "shards.json"
+UPSTREAM_TIMEOUT = float(os.environ.get("UPSTREAM_TIMEOUT", 5))
+
+if not SHARDS_MANIFEST.exists():
+    raise FileNotFoundError(
+        f"{SHARDS_MANIFEST} not found. Run `python manage_results.py --shard N` first."
+    )
+
+with open(SHARDS_MANIFEST, encoding="utf-8") as fh:
+    shards = json.load(fh)["shards"]
+
+SHARD_FIRST = [s["first"] for s in shards]
+SHARD_URLS = [u.strip().rstrip("/") for u in os.environ.get("SHARD_URLS", "").split(",") if u.strip()]
+if len(SHARD_URLS) != len(shards):
+    raise RuntimeError(f"SHARD_URLS lists {len(SHARD_URLS)} nodes but the manifest has {len(shards)} shards.")
+
+# Shared by all requests so a search doesn't spawn a thread per shard each time
+fanout = ThreadPoolExecutor(max_workers=4 * len(SHARD_URLS))
+
+def owner(roll):
+    return SHARD_URLS[bisect_right(SHARD_FIRST, roll) - 1]
+
+@app.route("/")
+def index():
+    return render_template("index.html")
+
+@app.route("/result")
+def result():
+    roll = (request.args.get("roll") or "").strip()
+    if not roll.isdigit() or len(roll) != 7:
+        return render_template("not_found.html", roll=roll), 404
+
+    url = f"{owner(roll)}/result?{urlencode({'roll': roll})}"
+    try:
+        with urlopen(url, timeout=UPSTREAM_TIMEOUT) as upstream:
+            status, body, ctype = upstream.status, upstream.read(), upstream.headers.get("Content-Type")
+    except HTTPError as err:
+        status, body, ctype = err.code, err.read(), err.headers.get("Content-Type")
+    except URLError:
+        return Response("Result service temporarily unavailable.", status=502, mimetype="text/plain")
+    return Response(body, status=status, content_type=ctype)
+
+def shard_matches(base, params):
+    with urlopen(f"{base}/search?{urlencode(params)}", timeout=UPSTREAM_TIMEOUT) as upstream:
+        return json.load(upstream)
+
+@app.route("/search")
+def search():
+    query = (request.args.get("q") or "").strip()
+    school = (request.args.get("school") or "").strip()
+    terms = query_terms(query)
+    if not terms:
+        return render_template("search.html", query=query, school=school, matches=[])
+
+    params = {"q": query, "school": school, "format": "json"}
+    futures = [fanout.submit(shard_matches, url, params) for url in SHARD_URLS]
+    results = []
+    for future in futures:
+        try:
+            found = future.result()
+            results.append((found["matches"], found["truncated"]))
+        except (OSError, ValueError, KeyError):
+            pass
+    if not results:
+        return Response("Search service temporarily unavailable.", status=502, mimetype="text/plain")
+    return render_template(
+        "search.html", query=query, school=school,
+        matches=merge_matches(terms, [m for m, _ in results]),
+        truncated=any(t for _, t in results), partial=len(results) < len(futures),
+    )
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 8000)))
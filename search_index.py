@@ -0,0 +1,129 @@
+"""
+search_index.py
+---------------
+Token index over student and school names for the /search page.
+
+Every word of Name and SchoolName (plus the SchoolCode, stored as "@code")
+maps to the ids of the rows containing it. Words are kept as one sorted
+array with offsets into a single id array, so a prefix lookup is two
+bisects. A query intersects the id lists of its terms, rarest first, and
+stops adding terms once MAX_POSTINGS ids have been read; terms left out
+are checked on the surviving rows instead. At most MAX_CANDIDATES rows are
+ranked, and a search that had more is reported as truncated so the page
+can ask for a school code instead of silently missing students.
+"""
+
+import re
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+
+TOKEN_RE = re.compile(r"[A-Z0-9]+")
+MAX_CANDIDATES = 2000
+MAX_POSTINGS = 200_000
+TOP_K = 20
+MIN_QUERY_LEN = 3
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text or "").upper())
+
+def mask_roll(roll):
+    return f"{roll[:2]}***{roll[-2:]}"
+
+def row_tokens(name, school, code):
+    """Words indexed for a row: its name and school words plus "@code"."""
+    words = set(tokenize(name)) | set(tokenize(school))
+    if code:
+        words.add(f"@{code}")
+    return words
+
+def query_terms(query):
+    """Return the query's terms, or [] when it is too short to search."""
+    terms = tokenize(query)
+    return terms if sum(len(t) for t in terms) >= MIN_QUERY_LEN else []
+
+def score(terms, school_code, name, school, code):
+    """Rank key for a candidate row, or None when it doesn't match every term."""
+    if school_code and str(code) != str(school_code):
+        return None
+    name_words = tokenize(name)
+    words = name_words + tokenize(school)
+    if not all(any(w.startswith(t) for w in words) for t in terms):
+        return None
+    return (-sum(t in name_words for t in terms), str(name))
+
+def top_matches(terms, school_code, rows, k=TOP_K):
+    """Score (RollNo, Name, SchoolName, SchoolCode) rows and return the best k, rolls masked."""
+    hits = []
+    for roll, name, school, code in rows:
+        key = score(terms, school_code, name, school, code)
+        if key is not None:
+            hits.append((key, roll, name, school, code))
+    hits.sort()
+    return [
+        {"RollNo": mask_roll(roll), "Name": name, "SchoolName": school, "SchoolCode": code}
+        for _, roll, name, school, code in hits[:k]
+    ]
+
+def merge_matches(terms, match_lists, k=TOP_K):
+    """Combine already-masked results (e.g. from several shards) into one top-k list."""
+    hits = [
+        (score(terms, None, m["Name"], m["SchoolName"], m["SchoolCode"]), i, m)
+        for i, m in enumerate(m for matches in match_lists for m in matches)
+    ]
+    return [m for _, _, m in sorted(h for h in hits if h[0] is not None)[:k]]
+
+class SearchIndex:
+    def __init__(self, rows):
+        """rows: iterable of (RollNo, Name, SchoolName, SchoolCode)."""
+        self.rows = []
+        # Grow one compact id array per word rather than a list of (word, id) tuples
+        postings = {}
+        for i, (roll, name, school, code) in enumerate(rows):
+            self.rows.append((roll, name, school, code))
+            for w in row_tokens(name, school, code):
+                ids = postings.get(w)
+                if ids is None:
+                    ids = postings[sys.intern(w)] = array("I")
+                ids.append(i)
+
+        self.tokens = sorted(postings)
+        self.offsets = array("I", [0])
+        self.ids = array("I")
+        for w in self.tokens:
+            self.ids.extend(postings.pop(w))
+            self.offsets.append(len(self.ids))
+
+    def span(self, prefix):
+        lo = bisect_left(self.tokens, prefix)
+        hi = bisect_left(self.tokens, prefix + "\uffff", lo)
+        return self.offsets[lo], self.offsets[hi]
+
+    def exact_span(self, token):
+        lo = bisect_left(self.tokens, token)
+        hi = bisect_right(self.tokens, token, lo)
+        return self.offsets[lo], self.offsets[hi]
+
+    def search(self, query, school_code=None, k=TOP_K):
+        """Return (up to k matches with masked rolls, whether candidates were cut off)."""
+        terms = query_terms(query)
+        if not terms:
+            return [], False
+        spans = [self.span(t) for t in terms]
+        if school_code:
+            # School codes filter by exact match: "@123" must not span "@1234"
+            spans.append(self.exact_span(f"@{school_code}"))
+        spans.sort(key=lambda s: s[1] - s[0])
+
+        lo, hi = spans[0]
+        candidates = set(self.ids[lo:hi])
+        budget = MAX_POSTINGS - (hi - lo)
+        for lo, hi in spans[1:]:
+            if not candidates or hi - lo > budget:
+                break
+            budget -= hi - lo
+            candidates.intersection_update(self.ids[lo:hi])
+
+        truncated = len(candidates) > MAX_CANDIDATES
+        picked = sorted(candidates)[:MAX_CANDIDATES]
+        return top_matches(terms, school_code, (self.rows[i] for i in picked), k), truncated